@@ -1,27 +1,76 @@
+import codecs
+import io
+import math
 import os
 import textwrap
 import tiktoken
-from typing import Set, List, Dict, Optional, Union, Any
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from operator import attrgetter
+from typing import Set, List, Dict, Iterable, Iterator, NamedTuple, Optional, Tuple, Union, Any, TextIO
+from xml.sax.saxutils import quoteattr
+
+class FileSummary(NamedTuple):
+    """
+    A summarized file: its name and (possibly truncated) content.
+    """
+    name: str
+    summary: str
+
+class DirectorySummary(NamedTuple):
+    """
+    The summarized files of one directory, relative to the repository root ('' for top-level).
+    """
+    directory: str
+    files: List[FileSummary]
+
+# O_BINARY keeps Windows from translating line endings on raw reads
+_READ_FLAGS = os.O_RDONLY | getattr(os, 'O_BINARY', 0)
+_READ_CHUNK_SIZE = 1 << 20
+_BINARY_SNIFF_BYTES = 4096  # Leading bytes checked for NUL before reading the rest
+
+def _read_fd(fd: int, limit: Optional[int] = None) -> bytes:
+    """
+    Read up to limit bytes from a file descriptor (everything left if None) using raw os.read calls.
+    
+    This skips the BufferedReader that open() would set up for every file. os.read
+    allocates its full request up front, so each call asks for at most
+    _READ_CHUNK_SIZE bytes however large limit is.
+    """
+    chunks = []
+    remaining = limit
+    while remaining is None or remaining > 0:
+        chunk = os.read(fd, _READ_CHUNK_SIZE if remaining is None else min(remaining, _READ_CHUNK_SIZE))
+        if not chunk:
+            break
+        chunks.append(chunk)
+        if remaining is not None:
+            remaining -= len(chunk)
+    return b"".join(chunks)
 
 class RepoForge:
     """
     A class for generating formatted prompts from repository directories.
     """
     # Default configuration constants
-    DEFAULT_IGNORED_DIRS = {'.git', '__pycache__', '.idea', '.vscode'}
-    DEFAULT_IGNORED_EXTENSIONS = {'.pyc', '.png', '.jpg', '.jpeg', '.gif', '.pdf', '.zip', '.env'}
+    DEFAULT_IGNORED_DIRS = frozenset({'.git', '__pycache__', '.idea', '.vscode'})
+    DEFAULT_IGNORED_EXTENSIONS = frozenset({'.pyc', '.png', '.jpg', '.jpeg', '.gif', '.pdf', '.zip', '.env'})
     DEFAULT_MAX_FILE_SIZE_BYTES = 1_000_000_000  # Skip summarizing files larger than this
     DEFAULT_TOKEN_LIMIT = 128_000  # Maximum tokens for the prompt
+    DEFAULT_MAX_WORKERS = min(32, (os.cpu_count() or 1) * 4)  # Threads used to read files
     
     def __init__(
         self,
         ignored_dirs: Optional[Set[str]] = None,
         ignored_extensions: Optional[Set[str]] = None,
-        max_file_size_bytes: float = DEFAULT_MAX_FILE_SIZE_BYTES,
+        max_file_size_bytes: Optional[float] = DEFAULT_MAX_FILE_SIZE_BYTES,
         max_chars: Optional[int] = 1_000_000_000,
         ignore_max_chars_for: Optional[List[str]] = None,
         model: str = "o1-pro",
-        token_limit: Optional[int] = None
+        token_limit: Optional[int] = None,
+        max_workers: Optional[int] = None,
+        cache: Optional[Dict[Any, Any]] = None,
+        sort_entries: bool = True
     ):
         """
         Initialize the RepoForge instance.
@@ -29,30 +78,53 @@ class RepoForge:
         Parameters:
             ignored_dirs: Additional directories to ignore (combined with defaults)
             ignored_extensions: Additional file extensions to ignore (combined with defaults)
-            max_file_size_bytes: Maximum file size for summarizing
+            max_file_size_bytes: Maximum file size in bytes for summarizing (None or float('inf') means no limit)
             max_chars: Maximum characters to include in the summary (None means no limit)
             ignore_max_chars_for: List of file patterns or directory paths that should ignore the max_chars limit
             model: The model to use for token counting
             token_limit: Maximum number of tokens for the prompt (defaults to DEFAULT_TOKEN_LIMIT if None)
+            max_workers: Number of threads used to read files (defaults to DEFAULT_MAX_WORKERS if None)
+            cache: Optional dict used to reuse file summaries across calls; entries are
+                keyed by path and settings and reused only while the file's mtime and
+                size are unchanged (None disables caching)
+            sort_entries: Sort directory entries by name; if False, entries keep the order
+                the filesystem returns them in, which is cheaper but not stable across systems
         """
-        self.ignored_dirs = self.DEFAULT_IGNORED_DIRS.copy()
-        if ignored_dirs:
-            self.ignored_dirs.update(ignored_dirs)
+        # Each instance gets its own mutable copy; the class defaults stay frozen
+        self.ignored_dirs = set(self.DEFAULT_IGNORED_DIRS) | set(ignored_dirs or ())
             
-        self.ignored_extensions = self.DEFAULT_IGNORED_EXTENSIONS.copy()
-        if ignored_extensions:
-            self.ignored_extensions.update(ignored_extensions)
+        self.ignored_extensions = set(self.DEFAULT_IGNORED_EXTENSIONS) | set(ignored_extensions or ())
             
-        self.max_file_size_bytes = max_file_size_bytes
+        # Stored as an int so the per-file size check compares int to int;
+        # non-finite values such as float('inf') mean no limit.
+        if max_file_size_bytes is not None and math.isfinite(max_file_size_bytes):
+            self.max_file_size_bytes = int(max_file_size_bytes)
+        else:
+            self.max_file_size_bytes = None
         self.max_chars = max_chars
         self.ignore_max_chars_for = ignore_max_chars_for or []
+        # (pattern, normalized path, is an existing directory, basename) per pattern,
+        # so summarize_text_file does not stat every pattern for every file.
+        self._ignore_max_chars_patterns = [
+            (pattern, os.path.normpath(pattern), os.path.isdir(os.path.normpath(pattern)), os.path.basename(pattern))
+            for pattern in self.ignore_max_chars_for
+        ]
+        # Directory part of the ignore_max_chars_for check, memoized per directory
+        self._dir_ignores_max_chars = {}
         self.model = model
         self.token_limit = token_limit if token_limit is not None else self.DEFAULT_TOKEN_LIMIT
+        self.max_workers = max_workers if max_workers is not None else self.DEFAULT_MAX_WORKERS
+        self.cache = cache
+        self.sort_entries = sort_entries
 
     def summarize_text_file(self, filepath: str, max_chars: Optional[int] = None) -> str:
         """
         Return a truncated summary of a text file.
         
+        With a max_chars limit only the start of the file is read (at most
+        4 * (max_chars + 1) bytes), so invalid UTF-8 beyond that point no longer
+        turns the summary into a decode error; the truncated content is returned.
+        
         Parameters:
             filepath: Path to the file
             max_chars: Maximum characters to include (None means no limit)
@@ -60,90 +132,198 @@ class RepoForge:
         Returns:
             A string containing the file content, potentially truncated
         """
-        # Check if this file should ignore the max_chars limit
-        # This can be because the file matches a pattern or is in a directory that should be ignored
-        normalized_path = os.path.normpath(filepath)
-        file_dir = os.path.dirname(normalized_path)
+        summary, _ = self._summarize_text_file(filepath, max_chars)
+        return summary
+
+    def _summarize_text_file(self, filepath: str, max_chars: Optional[int] = None) -> Tuple[str, bool]:
+        """
+        Summarize a text file, reporting whether it could be read.
         
-        should_ignore_limit = False
-        for pattern in self.ignore_max_chars_for:
-            # Check if the pattern is in the filepath (file pattern match)
-            if pattern in normalized_path:
-                should_ignore_limit = True
-                break
-            
-            # Check if the pattern is a directory and the file is in that directory
-            pattern_path = os.path.normpath(pattern)
-            if os.path.isdir(pattern_path) and file_dir.startswith(pattern_path):
-                should_ignore_limit = True
-                break
+        Parameters:
+            filepath: Path to the file
+            max_chars: Maximum characters to include (None means no limit)
             
-            # Also check if the pattern is a directory name that appears in the path
-            if os.path.basename(pattern) in file_dir.split(os.sep):
-                should_ignore_limit = True
-                break
-        
-        if should_ignore_limit:
+        Returns:
+            A (summary, ok) tuple; ok is False when the summary is an error message,
+            which callers should not cache since the failure may be transient
+        """
+        # Check if this file should ignore the max_chars limit (nothing to do
+        # when there is no limit or no patterns, which is the common case)
+        if max_chars is not None and self._ignore_max_chars_patterns and self._ignores_max_chars(filepath):
             max_chars = None
             
-        summary_lines = []
+        if max_chars is not None and filepath.endswith('.csv'):
+            # Special handling for CSV files (limit to fewer characters)
+            max_chars = max_chars // 10
+
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                content = f.read()
-                
-                if max_chars is not None and len(content) > max_chars:
-                    content = content[:max_chars] + "\n... [Truncated]"
-                
-                summary_lines = content.split('\n')
-                
-                # Special handling for CSV files (limit to fewer lines)
-                if filepath.endswith('.csv') and max_chars is not None:
-                    csv_max_chars = max_chars // 10
-                    csv_content = '\n'.join(summary_lines)
-                    if len(csv_content) > csv_max_chars:
-                        csv_content = csv_content[:csv_max_chars] + "\n... [Truncated]"
-                        summary_lines = csv_content.split('\n')
-                        
+            # Read bytes and decode once instead of going through TextIOWrapper.
+            # One character past the limit is enough to know whether the content
+            # needs truncating, and a UTF-8 character is at most 4 bytes.
+            cap = None if max_chars is None else 4 * (max_chars + 1)
+            fd = os.open(filepath, _READ_FLAGS)
+            try:
+                limit = cap
+                if cap is not None:
+                    # A sized read allocates its whole buffer up front, so never
+                    # ask for more than the file holds (plus one byte to notice
+                    # growth); the default max_chars would otherwise mean ~4 GB.
+                    limit = min(cap, os.fstat(fd).st_size + 1)
+                # Sniff the start of the file first: text files do not contain NUL
+                # bytes (the same heuristic git uses), so binary files that got past
+                # the extension filter are rejected without reading the rest.
+                head_limit = _BINARY_SNIFF_BYTES if limit is None else min(limit, _BINARY_SNIFF_BYTES)
+                raw = _read_fd(fd, head_limit)
+                if b'\x00' in raw:
+                    return "[Binary file; skipping content]", True
+                if len(raw) == head_limit:
+                    raw += _read_fd(fd, None if limit is None else limit - head_limit)
+            finally:
+                os.close(fd)
+            complete = limit is None or len(raw) < limit
+            # A capped read may end inside a multi-byte character; the
+            # incremental decoder holds that tail back instead of failing.
+            content = codecs.getincrementaldecoder('utf-8')().decode(raw, final=complete)
         except Exception as e:
-            summary_lines = [f"Error reading file: {e}"]
+            return f"Error reading file: {e}", False
+
+        if '\r' in content:
+            # Universal newlines, as text mode would have applied
+            content = content.replace('\r\n', '\n').replace('\r', '\n')
+
+        if max_chars is not None and len(content) > max_chars:
+            content = content[:max_chars] + "\n... [Truncated]"
+
+        return content, True
+
+    def _ignores_max_chars(self, filepath: str) -> bool:
+        """
+        Check whether a file matches ignore_max_chars_for.
         
-        return "\n".join(summary_lines)
+        This can be because the file matches a pattern or is in a directory that should be ignored.
+        
+        Parameters:
+            filepath: Path to the file
+            
+        Returns:
+            True if the max_chars limit should not apply to the file
+        """
+        normalized_path = os.path.normpath(filepath)
 
-    def create_directory_tree(self, root_dir: str) -> str:
+        # Check if a pattern is in the filepath (file pattern match)
+        for pattern, _, _, _ in self._ignore_max_chars_patterns:
+            if pattern in normalized_path:
+                return True
+
+        # The directory checks only depend on the file's directory, so they are
+        # computed once per directory rather than once per file.
+        file_dir = os.path.dirname(normalized_path)
+        dir_ignores = self._dir_ignores_max_chars.get(file_dir)
+        if dir_ignores is None:
+            dir_parts = file_dir.split(os.sep)
+            dir_ignores = any(
+                # The pattern is a directory and the file is in that directory, or
+                # the pattern is a directory name that appears in the path
+                (pattern_is_dir and file_dir.startswith(pattern_path)) or pattern_basename in dir_parts
+                for _, pattern_path, pattern_is_dir, pattern_basename in self._ignore_max_chars_patterns
+            )
+            self._dir_ignores_max_chars[file_dir] = dir_ignores
+        return dir_ignores
+
+    def _walk_repo(self, root_dir: str) -> Tuple[str, List[Tuple[str, List[os.DirEntry]]]]:
         """
-        Create a plain-text directory tree outline for quick reference.
+        Walk the repo once, collecting both the directory tree and the files to summarize.
         
         Parameters:
             root_dir: Path to the repository directory
             
         Returns:
-            A string containing the directory tree
+            A (directory_tree, files_by_directory) tuple, where files_by_directory is
+            [(<relative_path>, [<DirEntry>, ...]), ...] in walk order, holding only the
+            files that pass the name filters; directories without any are left out
         """
-        tree_lines = []
+        # The tree is written piece by piece into a buffer instead of
+        # concatenating prefix + connector + name into a new string per entry.
+        tree = io.StringIO()
+        write = tree.write
+        files_by_directory = []
+        ignored_dirs = self.ignored_dirs
+        ignored_extensions = self.ignored_extensions
+        sort_entries = self.sort_entries
+        by_name = attrgetter('name')
+
+        def scan(path, rel_dir, prefix):
+            try:
+                with os.scandir(path) as it:
+                    # Filter before sorting so ignored entries are never compared
+                    entries = [e for e in it if e.name not in ignored_dirs]
+            except OSError:
+                if not rel_dir:
+                    raise  # The root itself must be readable
+                return  # Unreadable subdirectory: it is listed, but its contents are skipped
+            if sort_entries:
+                entries.sort(key=by_name)
+
+            files = []
+            for entry in entries:
+                filename = entry.name
+                # is_file() follows symlinks, so linked files are summarized but
+                # linked directories, sockets and FIFOs are not.
+                if filename.startswith('.') or not entry.is_file():
+                    continue
+                # Same result as os.path.splitext for a bare, non-dotfile name
+                dot = filename.rfind('.')
+                ext = filename[dot:].lower() if dot > 0 else ''
+                if ext not in ignored_extensions:
+                    files.append(entry)
+            if files:
+                files_by_directory.append((rel_dir, files))
+
+            # Push in reverse so entries are popped in order
+            last = len(entries) - 1
+            for i in range(last, -1, -1):
+                stack.append((entries[i], rel_dir, prefix, i == last))
 
-        def walk_directory(path, prefix=""):
-            entries = sorted(os.listdir(path))
-            entries = [e for e in entries if e not in self.ignored_dirs]
-            
-            for i, entry in enumerate(entries):
-                full_path = os.path.join(path, entry)
-                connector = "└── " if i == len(entries) - 1 else "├── "
-                if os.path.isdir(full_path):
-                    tree_lines.append(prefix + connector + entry + "/")
-                    new_prefix = prefix + ("    " if i == len(entries) - 1 else "│   ")
-                    walk_directory(full_path, new_prefix)
-                else:
-                    # We do not filter file extensions in the directory tree view.
-                    tree_lines.append(prefix + connector + entry)
-        
         # Start the tree with the root directory's basename
         root_basename = os.path.basename(os.path.normpath(root_dir)) or root_dir
-        tree_lines.append(root_basename + "/")
-        walk_directory(root_dir, prefix="")
+        write(root_basename)
+        write("/")
+
+        # Explicit stack of (entry, parent_relative_path, prefix, is_last) instead
+        # of recursion, so deep trees cannot hit the recursion limit. Each
+        # directory is scanned exactly once, when its tree line is emitted.
+        stack = []
+        scan(root_dir, '', "")
+        while stack:
+            entry, parent_rel_dir, prefix, is_last = stack.pop()
+            # We do not filter file extensions in the directory tree view.
+            write("\n")
+            write(prefix)
+            write("└── " if is_last else "├── ")
+            write(entry.name)
+            # DirEntry.is_dir uses the type from the directory read; symlinked
+            # directories are listed but not followed.
+            if entry.is_dir(follow_symlinks=False):
+                write("/")
+                rel_dir = os.path.join(parent_rel_dir, entry.name) if parent_rel_dir else entry.name
+                scan(entry.path, rel_dir, prefix + ("    " if is_last else "│   "))
+
+        return tree.getvalue(), files_by_directory
 
-        return "\n".join(tree_lines)
+    def create_directory_tree(self, root_dir: str) -> str:
+        """
+        Create a plain-text directory tree outline for quick reference.
+        
+        Parameters:
+            root_dir: Path to the repository directory
+            
+        Returns:
+            A string containing the directory tree
+        """
+        directory_tree, _ = self._walk_repo(root_dir)
+        return directory_tree
 
-    def create_repo_summary(self, root_dir: str) -> List[Dict[str, Any]]:
+    def create_repo_summary(self, root_dir: str) -> List[DirectorySummary]:
         """
         Walk the repo, build a data structure with directory/file info and summaries.
         
@@ -151,51 +331,154 @@ class RepoForge:
             root_dir: Path to the repository directory
             
         Returns:
-            A list of entries: [{ 'directory': <relative_path>, 'files': [...] }, ...]
+            A list of DirectorySummary entries, one per directory with files
         """
-        repo_summary = []
+        return list(self.iter_repo_summary(root_dir))
 
-        for current_path, dirs, files in os.walk(root_dir):
-            # Filter out ignored directories
-            dirs[:] = [d for d in dirs if d not in self.ignored_dirs]
+    def iter_repo_summary(self, root_dir: str) -> Iterator[DirectorySummary]:
+        """
+        Walk the repo and yield each directory's summary as soon as it is ready.
+        
+        Unlike create_repo_summary, only a bounded number of directories are held
+        in memory at a time.
+        
+        Parameters:
+            root_dir: Path to the repository directory
+            
+        Yields:
+            DirectorySummary entries, one per directory with files
+        """
+        _, files_by_directory = self._walk_repo(root_dir)
+        yield from self._iter_summaries(files_by_directory)
 
-            rel_dir = os.path.relpath(current_path, root_dir)
-            if rel_dir == '.':
-                rel_dir = ''  # top-level
+    def _iter_summaries(self, files_by_directory: List[Tuple[str, List[os.DirEntry]]]) -> Iterator[DirectorySummary]:
+        """
+        Summarize the files collected by _walk_repo, one directory at a time.
+        
+        Parameters:
+            files_by_directory: File listing from _walk_repo
+            
+        Yields:
+            DirectorySummary entries, one per directory with files
+        """
+        cache = self.cache
+        settings = (self.max_chars, tuple(self.ignore_max_chars_for))
+        max_file_size_bytes = self.max_file_size_bytes
+        # Reads queued ahead of the consumer; enough to keep the pool busy while
+        # bounding how many finished summaries wait in memory.
+        max_queued_reads = 2 * self.max_workers
 
+        def resolve(rel_dir, file_plans):
             file_summaries = []
-            for filename in sorted(files):  # Sort files for consistent output
-                _, ext = os.path.splitext(filename)
-                if ext.lower() in self.ignored_extensions or filename.startswith('.'):
-                    continue
+            for filename, summary, pending in file_plans:
+                if pending is not None:
+                    cache_key, stamp, future = pending
+                    summary, ok = future.result()
+                    # Read errors are not cached: a later call should retry them
+                    if cache is not None and ok:
+                        cache[cache_key] = (stamp, summary)
+                file_summaries.append(FileSummary(filename, summary))
+            return DirectorySummary(rel_dir, file_summaries)
 
-                full_path = os.path.join(current_path, filename)
-                size_bytes = os.path.getsize(full_path)
+        # Reading files is I/O-bound, so summaries are computed on a thread pool;
+        # read() releases the GIL.
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            # (rel_dir, [(filename, summary, pending), ...], read_count) per directory
+            # whose reads are submitted; pending is set while a read is queued.
+            queued = deque()
+            queued_reads = 0
+            for rel_dir, files in files_by_directory:
+                file_plans = []
+                read_count = 0
+                for entry in files:
+                    filename = entry.name
+                    full_path = entry.path
+                    stat_result = entry.stat()
+                    size_bytes = stat_result.st_size
 
-                if size_bytes > self.max_file_size_bytes:
-                    file_summaries.append({
-                        'name': filename,
-                        'summary': f"File size ({size_bytes} bytes) exceeds limit; skipping content."
-                    })
-                    continue
+                    if max_file_size_bytes is not None and size_bytes > max_file_size_bytes:
+                        summary = f"File size ({size_bytes} bytes) exceeds limit; skipping content."
+                        file_plans.append((filename, summary, None))
+                        continue
+
+                    # A directory's mtime does not change when a file in it is
+                    # edited, so each file is validated against its own stat.
+                    cache_key = stamp = None
+                    if cache is not None:
+                        cache_key = (full_path, settings)
+                        stamp = (stat_result.st_mtime_ns, size_bytes)
+                        cached = cache.get(cache_key)
+                        if cached is not None and cached[0] == stamp:
+                            file_plans.append((filename, cached[1], None))
+                            continue
 
-                file_content_summary = self.summarize_text_file(full_path, max_chars=self.max_chars)
-                file_summaries.append({
-                    'name': filename,
-                    'summary': file_content_summary
-                })
+                    future = executor.submit(self._summarize_text_file, full_path, self.max_chars)
+                    file_plans.append((filename, None, (cache_key, stamp, future)))
+                    read_count += 1
 
-            if file_summaries:
-                repo_summary.append({
-                    'directory': rel_dir,
-                    'files': file_summaries
-                })
+                queued.append((rel_dir, file_plans, read_count))
+                queued_reads += read_count
+                while queued_reads > max_queued_reads:
+                    rel_dir, file_plans, read_count = queued.popleft()
+                    queued_reads -= read_count
+                    yield resolve(rel_dir, file_plans)
 
-        return repo_summary
+            while queued:
+                rel_dir, file_plans, _ = queued.popleft()
+                yield resolve(rel_dir, file_plans)
+
+    def write_prompt_xml(
+        self,
+        out_fp: TextIO,
+        repo_summary: Iterable[DirectorySummary],
+        directory_tree: str,
+        system_message: str = "",
+        user_instructions: str = ""
+    ) -> None:
+        """
+        Write the repository summary and directory tree to a file object as a textual prompt with XML tags.
+        
+        Parameters:
+            out_fp: Writable text file object (e.g. sys.stdout or an open file)
+            repo_summary: Repository summary from create_repo_summary or iter_repo_summary;
+                it is consumed once, so each directory is written as soon as it arrives
+            directory_tree: Directory tree from create_directory_tree
+            system_message: Optional system message
+            user_instructions: Optional user instructions
+        """
+        write = out_fp.write
+
+        # Embed system and user instructions in XML tags
+        write("<SYSTEM_MESSAGE>\n")
+        write(system_message.strip() if system_message else "No system message provided.")
+        write("\n</SYSTEM_MESSAGE>\n\n")
+
+        write("<USER_INSTRUCTIONS>\n")
+        write(user_instructions.strip() if user_instructions else "No user instructions provided.")
+        write("\n</USER_INSTRUCTIONS>\n\n")
+
+        # Add the directory tree at the top
+        write("<DIRECTORY_TREE>\n")
+        write(directory_tree)
+        write("\n</DIRECTORY_TREE>\n\n")
+
+        write("<REPOSITORY_CONTENTS>\n")
+        for entry in repo_summary:
+            dir_path = entry.directory or "(top-level)"
+            # quoteattr escapes &, < and quotes so odd names cannot break the tags
+            write(f'  <directory name={quoteattr(dir_path)}>\n')
+            for file_info in entry.files:
+                write(f'    <file name={quoteattr(file_info.name)}>\n      <content>\n         ')
+                # Indent the whole summary with one replace() rather than line by
+                # line; every line, blank or not, gets the prefix.
+                write(file_info.summary.replace("\n", "\n         "))
+                write("\n      </content>\n    </file>\n")
+            write("  </directory>\n")
+        write("</REPOSITORY_CONTENTS>")
 
     def format_prompt_xml(
         self, 
-        repo_summary: List[Dict[str, Any]], 
+        repo_summary: Iterable[DirectorySummary], 
         directory_tree: str, 
         system_message: str = "", 
         user_instructions: str = ""
@@ -212,37 +495,9 @@ class RepoForge:
         Returns:
             A formatted prompt string
         """
-        prompt_parts = []
-
-        # Embed system and user instructions in XML tags
-        prompt_parts.append("<SYSTEM_MESSAGE>")
-        prompt_parts.append(system_message.strip() if system_message else "No system message provided.")
-        prompt_parts.append("</SYSTEM_MESSAGE>\n")
-
-        prompt_parts.append("<USER_INSTRUCTIONS>")
-        prompt_parts.append(user_instructions.strip() if user_instructions else "No user instructions provided.")
-        prompt_parts.append("</USER_INSTRUCTIONS>\n")
-
-        # Add the directory tree at the top
-        prompt_parts.append("<DIRECTORY_TREE>")
-        prompt_parts.append(directory_tree)
-        prompt_parts.append("</DIRECTORY_TREE>\n")
-
-        prompt_parts.append("<REPOSITORY_CONTENTS>")
-        for entry in repo_summary:
-            dir_path = entry['directory'] or "(top-level)"
-            prompt_parts.append(f'  <directory name="{dir_path}">')
-            for file_info in entry['files']:
-                prompt_parts.append(f'    <file name="{file_info["name"]}">')
-                prompt_parts.append("      <content>")
-                for line in file_info["summary"].split("\n"):
-                    prompt_parts.append("         " + line)
-                prompt_parts.append("      </content>")
-                prompt_parts.append("    </file>")
-            prompt_parts.append("  </directory>")
-        prompt_parts.append("</REPOSITORY_CONTENTS>")
-
-        return "\n".join(prompt_parts)
+        buf = io.StringIO()
+        self.write_prompt_xml(buf, repo_summary, directory_tree, system_message, user_instructions)
+        return buf.getvalue()
 
     def count_tokens(self, text: str) -> int:
         """
@@ -280,8 +535,11 @@ class RepoForge:
         if not os.path.isdir(repo_dir):
             raise ValueError(f"Directory {repo_dir} does not exist.")
         
-        directory_tree = self.create_directory_tree(repo_dir)
-        repo_summary = self.create_repo_summary(repo_dir)
+        # One walk serves both the directory tree and the file summaries
+        directory_tree, files_by_directory = self._walk_repo(repo_dir)
+        # Summaries are produced lazily and written as they arrive, so only a
+        # few directories' contents are held in memory besides the output.
+        repo_summary = self._iter_summaries(files_by_directory)
         formatted_prompt = self.format_prompt_xml(
             repo_summary=repo_summary,
             directory_tree=directory_tree,
@@ -306,7 +564,10 @@ class RepoForge:
                 max_chars=new_max_chars,
                 ignore_max_chars_for=self.ignore_max_chars_for,
                 model=self.model,
-                token_limit=self.token_limit
+                token_limit=self.token_limit,
+                max_workers=self.max_workers,
+                cache=self.cache,
+                sort_entries=self.sort_entries
             )
             
             return new_instance.generate_prompt(
@@ -318,6 +579,44 @@ class RepoForge:
         print(f"Final token count: {token_count}")
         return formatted_prompt
 
+    def write_prompt(
+        self,
+        repo_dir: str,
+        out_fp: TextIO,
+        system_message: str = "",
+        user_instructions: str = ""
+    ) -> None:
+        """
+        Write a formatted prompt for a repository directory straight to a file object.
+        
+        Unlike generate_prompt, the prompt is never held in memory as a single
+        string, so the token limit is not enforced.
+        
+        Parameters:
+            repo_dir: Path to the repository directory
+            out_fp: Writable text file object (e.g. sys.stdout or an open file)
+            system_message: Optional system message
+            user_instructions: Optional user instructions
+        
+        Raises:
+            ValueError: If the provided directory does not exist
+        """
+        if not os.path.isdir(repo_dir):
+            raise ValueError(f"Directory {repo_dir} does not exist.")
+        
+        # One walk serves both the directory tree and the file summaries
+        directory_tree, files_by_directory = self._walk_repo(repo_dir)
+        # Summaries are produced lazily and written as they arrive, so only a
+        # few directories' contents are held in memory besides the output.
+        repo_summary = self._iter_summaries(files_by_directory)
+        self.write_prompt_xml(
+            out_fp,
+            repo_summary=repo_summary,
+            directory_tree=directory_tree,
+            system_message=system_message,
+            user_instructions=user_instructions
+        )
+
     def generate_prompt_with_metadata(
         self,
         repo_dir: str,
@@ -347,10 +646,11 @@ class RepoForge:
         """
         prompt = self.generate_prompt(repo_dir, system_message, user_instructions)
         
-        # Count files and directories in the repo summary
-        repo_summary = self.create_repo_summary(repo_dir)
-        directory_count = len(repo_summary)
-        file_count = sum(len(entry['files']) for entry in repo_summary)
+        # Count files and directories in the repo summary; the walk alone gives
+        # these, so no file has to be read again.
+        _, files_by_directory = self._walk_repo(repo_dir)
+        directory_count = len(files_by_directory)
+        file_count = sum(len(files) for _, files in files_by_directory)
         
         return {
             'prompt': prompt,
@@ -373,7 +673,7 @@ if __name__ == "__main__":
     parser.add_argument("--ignored-dirs", nargs="+", default=[], help="Additional directories to ignore")
     parser.add_argument("--ignored-extensions", nargs="+", default=[], help="Additional file extensions to ignore")
     parser.add_argument("--max-file-size", type=float, default=RepoForge.DEFAULT_MAX_FILE_SIZE_BYTES, 
-                        help="Maximum file size for summarizing")
+                        help="Maximum file size in bytes for summarizing")
     parser.add_argument("--max-chars", type=int, default=None, 
                         help="Maximum characters to include in the summary (None means no limit)")
     parser.add_argument("--ignore-max-chars-for", nargs="+", default=[], 
@@ -381,8 +681,14 @@ if __name__ == "__main__":
     parser.add_argument("--model", default="o1-pro", help="The model to use for token counting")
     parser.add_argument("--token-limit", type=int, default=None, 
                         help="Maximum number of tokens for the prompt (defaults to DEFAULT_TOKEN_LIMIT if None)")
+    parser.add_argument("--max-workers", type=int, default=None,
+                        help="Number of threads used to read files (defaults to DEFAULT_MAX_WORKERS if None)")
+    parser.add_argument("--no-sort", action="store_true",
+                        help="Keep directory entries in filesystem order instead of sorting them by name")
     parser.add_argument("--with-metadata", action="store_true", 
                         help="Include metadata about the generated prompt")
+    parser.add_argument("--stream", action="store_true",
+                        help="Write the prompt to stdout as it is built (the token limit is not enforced)")
     
     args = parser.parse_args()
     
@@ -394,10 +700,20 @@ if __name__ == "__main__":
             max_chars=args.max_chars,
             ignore_max_chars_for=args.ignore_max_chars_for,
             model=args.model,
-            token_limit=args.token_limit
+            token_limit=args.token_limit,
+            max_workers=args.max_workers,
+            sort_entries=not args.no_sort
         )
         
-        if args.with_metadata:
+        if args.stream:
+            repo_forge.write_prompt(
+                args.repo_dir,
+                sys.stdout,
+                system_message=args.system_message,
+                user_instructions=args.user_instructions
+            )
+            sys.stdout.write("\n")
+        elif args.with_metadata:
             result = repo_forge.generate_prompt_with_metadata(
                 args.repo_dir,
                 system_message=args.system_message,